@@ -0,0 +1,244 @@
+"""
+Daily Tech Brief - Story Archival Script
+Moves old stories out of Supabase into day-partitioned gzipped JSONL files
+and strips raw_content from summarized stories to keep the hot table small
+"""
+
+import os
+import json
+import gzip
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Iterator, Optional
+from collections import defaultdict
+
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+import resilience
+
+# Load environment variables
+load_dotenv()
+
+# Configure Supabase
+supabase: Client = create_client(
+    os.getenv("SUPABASE_URL"),
+    os.getenv("SUPABASE_KEY")
+)
+
+# Archive configuration
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "../archive")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+BATCH_SIZE = 500
+
+# Archive layout:
+#   <ARCHIVE_DIR>/stories/YYYY/MM/YYYY-MM-DD.jsonl.gz      full story rows
+#   <ARCHIVE_DIR>/raw_content/YYYY/MM/YYYY-MM-DD.jsonl.gz  {id, raw_content} stripped from hot rows
+# Files are append-only gzip members, so a crashed run can only leave
+# duplicates behind, which the reader drops by story id.
+STORIES_KIND = "stories"
+RAW_CONTENT_KIND = "raw_content"
+
+
+def partition_day(story: Dict) -> str:
+    """Get the partition day (YYYY-MM-DD) for a story, based on created_at"""
+    return str(story.get("created_at") or date.today().isoformat())[:10]
+
+
+def partition_path(kind: str, day: str) -> str:
+    """Get the file path of a day partition"""
+    year, month, _ = day.split("-")
+    return os.path.join(ARCHIVE_DIR, kind, year, month, f"{day}.jsonl.gz")
+
+
+def append_to_partitions(kind: str, rows: List[Dict]) -> int:
+    """Append rows to their day partitions, returning the number written"""
+    rows_by_day = defaultdict(list)
+    for row in rows:
+        rows_by_day[partition_day(row)].append(row)
+
+    written = 0
+    for day, day_rows in rows_by_day.items():
+        path = partition_path(kind, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in day_rows:
+                f.write(json.dumps(row, default=str) + "\n")
+                written += 1
+
+            # Make sure the data is on disk before rows are removed from the database
+            f.flush()
+            os.fsync(f.fileno())
+
+    return written
+
+
+def read_partition(path: str) -> Iterator[Dict]:
+    """Stream rows from a single partition file"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def list_partitions(kind: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[str]:
+    """List partition days of a given kind within an optional date range, oldest first"""
+    root = os.path.join(ARCHIVE_DIR, kind)
+    if not os.path.isdir(root):
+        return []
+
+    days = []
+    for _, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(".jsonl.gz"):
+                days.append(name[:-len(".jsonl.gz")])
+
+    if start_date:
+        days = [d for d in days if d >= start_date.isoformat()]
+    if end_date:
+        days = [d for d in days if d <= end_date.isoformat()]
+
+    return sorted(days)
+
+
+def iter_archived_stories(start_date: Optional[date] = None, end_date: Optional[date] = None) -> Iterator[Dict]:
+    """
+    Stream archived stories back, oldest partition first.
+
+    raw_content that was stripped from hot rows before the story itself was
+    archived is restored from the raw_content partitions.
+    """
+    for day in list_partitions(STORIES_KIND, start_date, end_date):
+        raw_path = partition_path(RAW_CONTENT_KIND, day)
+        raw_content = {}
+        if os.path.exists(raw_path):
+            for row in read_partition(raw_path):
+                raw_content[row["id"]] = row["raw_content"]
+
+        seen_ids = set()
+        for story in read_partition(partition_path(STORIES_KIND, day)):
+            if story["id"] in seen_ids:
+                continue
+            seen_ids.add(story["id"])
+
+            if not story.get("raw_content") and story["id"] in raw_content:
+                story["raw_content"] = raw_content[story["id"]]
+
+            yield story
+
+
+def compact_summarized_stories() -> int:
+    """Move raw_content of processed stories to the archive and clear it in the hot table"""
+    compacted = 0
+
+    while True:
+        try:
+            result = supabase.table("stories") \
+                .select("id, created_at, raw_content") \
+                .eq("status", "processed") \
+                .not_.is_("raw_content", "null") \
+                .limit(BATCH_SIZE) \
+                .execute()
+        except Exception as e:
+            print(f"[ERROR] Error fetching stories to compact: {e}")
+            break
+
+        rows = result.data
+        if not rows:
+            break
+
+        append_to_partitions(RAW_CONTENT_KIND, rows)
+
+        try:
+            updated = resilience.call("supabase", lambda: supabase.table("stories")
+                                      .update({"raw_content": None})
+                                      .in_("id", [row["id"] for row in rows])
+                                      .execute())
+        except Exception as e:
+            print(f"[ERROR] Error clearing raw_content: {e}")
+            break
+
+        # Without this, a no-op update (e.g. blocked by RLS) would re-select
+        # and re-archive the same batch forever
+        if not updated.data:
+            print("[ERROR] raw_content was not cleared (check table permissions), stopping")
+            break
+
+        compacted += len(updated.data)
+
+        if len(rows) < BATCH_SIZE:
+            break
+
+    return compacted
+
+
+def archive_old_stories(days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Move stories older than N days to the archive and delete them from the hot table"""
+    cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+    archived = 0
+
+    while True:
+        try:
+            result = supabase.table("stories") \
+                .select("*") \
+                .lt("created_at", cutoff_date) \
+                .neq("status", "published") \
+                .order("created_at") \
+                .limit(BATCH_SIZE) \
+                .execute()
+        except Exception as e:
+            print(f"[ERROR] Error fetching old stories: {e}")
+            break
+
+        rows = result.data
+        if not rows:
+            break
+
+        append_to_partitions(STORIES_KIND, rows)
+
+        try:
+            deleted = resilience.call("supabase", lambda: supabase.table("stories")
+                                      .delete()
+                                      .in_("id", [row["id"] for row in rows])
+                                      .execute())
+        except Exception as e:
+            print(f"[ERROR] Error deleting archived stories: {e}")
+            break
+
+        # Stop rather than re-archiving the same batch if nothing was deleted
+        if not deleted.data:
+            print("[ERROR] Archived stories were not deleted (check table permissions), stopping")
+            break
+
+        archived += len(deleted.data)
+
+        if len(rows) < BATCH_SIZE:
+            break
+
+    return archived
+
+
+def main():
+    """Main archival workflow"""
+    print("=" * 60)
+    print("Daily Tech Brief - Story Archival")
+    print("=" * 60)
+    print()
+
+    # Step 1: Strip raw_content from summarized stories
+    print("Compacting summarized stories...")
+    compacted = compact_summarized_stories()
+    print(f"   Moved raw_content of {compacted} stories to archive")
+
+    # Step 2: Move old stories out of the hot table
+    print(f"\nArchiving stories older than {ARCHIVE_AFTER_DAYS} days...")
+    archived = archive_old_stories(days=ARCHIVE_AFTER_DAYS)
+    print(f"   Archived {archived} stories to {ARCHIVE_DIR}")
+
+    print(f"\n{'=' * 60}")
+    print("Archival complete!")
+    print(f"{'=' * 60}")
+
+
+if __name__ == "__main__":
+    main()
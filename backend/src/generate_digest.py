@@ -5,54 +5,82 @@ Selects top 5-8 stories from processed articles and creates daily digest
 
 import os
 from datetime import datetime, date, timedelta
-from typing import List, Dict
+from typing import List, Dict, Set
 from collections import Counter
 
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+import resilience
+from recorder import wrap_client, record_clock
 from sources import TOPICS
 
 # Load environment variables
 load_dotenv()
 
 # Configure Supabase
-supabase: Client = create_client(
+supabase: Client = wrap_client(create_client(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_KEY")
-)
+))
 
+# Days a featured story stays excluded from new digests
+USED_STORY_WINDOW_DAYS = int(os.getenv("USED_STORY_WINDOW_DAYS", "7"))
 
-def get_previously_used_story_ids(days: int = 7) -> List[str]:
+# Story columns needed for selection (raw_content is left in the archive)
+STORY_COLUMNS = "id, title, url, source, source_domain, summary, topics, trust_score, relevance_score, coverage_count, rank_score, published_at, status, created_at"
+
+
+def get_previously_used_story_ids(days: int = USED_STORY_WINDOW_DAYS) -> Set[str]:
     """Get story IDs that were already used in previous digests"""
     try:
         cutoff_date = (datetime.now() - timedelta(days=days)).date().isoformat()
-        result = supabase.table("daily_digests") \
-            .select("story_ids") \
+        result = supabase.table("digest_stories") \
+            .select("story_id") \
             .gte("digest_date", cutoff_date) \
             .execute()
 
-        # Flatten all story_ids from all digests
-        used_ids = []
-        for digest in result.data:
-            used_ids.extend(digest.get("story_ids", []))
-
-        return used_ids
+        return {row["story_id"] for row in result.data}
     except Exception as e:
         print(f"Error fetching previous digests: {e}")
-        return []
+        return set()
+
+
+def was_url_featured(url: str) -> bool:
+    """Check if a URL was ever featured in a digest"""
+    try:
+        result = supabase.table("digest_stories") \
+            .select("story_id") \
+            .eq("url", url) \
+            .limit(1) \
+            .execute()
+        return len(result.data) > 0
+    except Exception as e:
+        print(f"Error checking featured URL: {e}")
+        return False
+
+
+def get_source_feature_counts(days: int = USED_STORY_WINDOW_DAYS) -> Dict[str, int]:
+    """Get how many times each source was featured in digests over the last N days"""
+    try:
+        result = supabase.rpc("source_feature_counts", {"p_days": days}).execute()
+        return {row["source"]: row["feature_count"] for row in result.data}
+    except Exception as e:
+        print(f"Error fetching source feature counts: {e}")
+        return {}
 
 
-def get_processed_stories(days: int = 2, exclude_story_ids: List[str] = None) -> List[Dict]:
+def get_processed_stories(days: int = 2, exclude_story_ids: Set[str] = None) -> List[Dict]:
     """Get all processed stories from the last N days, excluding previously used ones"""
     try:
         # Get stories created in the last N days (not published_at, which might be older)
         cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
         result = supabase.table("stories") \
-            .select("*") \
+            .select(STORY_COLUMNS) \
             .eq("status", "processed") \
             .gte("created_at", cutoff_date) \
-            .order("relevance_score", desc=True) \
+            .not_.is_("rank_score", "null") \
+            .order("rank_score", desc=True) \
             .execute()
 
         # Filter out previously used stories
@@ -120,7 +148,7 @@ def ensure_topic_coverage(stories: List[Dict]) -> List[Dict]:
         if all(count >= req for req, count in zip(required_topics.values(), topic_coverage.values())):
             break
 
-    # Second pass: Fill remaining slots with highest relevance stories
+    # Second pass: Fill remaining slots with highest ranked stories
     for story in stories:
         story_id = story["id"]
 
@@ -135,35 +163,29 @@ def ensure_topic_coverage(stories: List[Dict]) -> List[Dict]:
     return selected
 
 
-def create_daily_digest(stories: List[Dict]) -> bool:
-    """Create daily digest entry in database"""
-    try:
-        today = date.today()
+def write_daily_digest(stories: List[Dict]) -> None:
+    """Write today's digest and its used-story ledger rows in one transaction"""
+    today = date.today()
 
-        # Check if digest already exists for today
-        existing = supabase.table("daily_digests") \
-            .select("id") \
-            .eq("digest_date", today.isoformat()) \
-            .execute()
+    result = supabase.rpc("save_daily_digest", {
+        "p_digest_date": today.isoformat(),
+        "p_stories": [
+            {"id": story["id"], "url": story["url"], "source": story["source"]}
+            for story in stories
+        ],
+    }).execute()
+
+    if result.data == "updated":
+        print(f"[OK] Updated existing digest for {today}")
+    else:
+        print(f"[OK] Created new digest for {today}")
 
-        story_ids = [story["id"] for story in stories]
-
-        if existing.data:
-            # Update existing digest
-            supabase.table("daily_digests") \
-                .update({"story_ids": story_ids}) \
-                .eq("digest_date", today.isoformat()) \
-                .execute()
-            print(f"[OK] Updated existing digest for {today}")
-        else:
-            # Create new digest
-            supabase.table("daily_digests").insert({
-                "digest_date": today.isoformat(),
-                "story_ids": story_ids,
-                "status": "ready",
-            }).execute()
-            print(f"[OK] Created new digest for {today}")
 
+def create_daily_digest(stories: List[Dict]) -> bool:
+    """Create daily digest entry in database"""
+    try:
+        # Safe to retry: save_daily_digest replaces the whole day
+        resilience.call("supabase", lambda: write_daily_digest(stories))
         return True
 
     except Exception as e:
@@ -178,12 +200,14 @@ def main():
     print("=" * 60)
     print()
 
+    record_clock("generate_digest")
+
     # Step 1: Get previously used story IDs
     print("Checking previously used stories...")
-    used_story_ids = get_previously_used_story_ids(days=7)
+    used_story_ids = get_previously_used_story_ids(days=USED_STORY_WINDOW_DAYS)
     print(f"   Excluding {len(used_story_ids)} previously used stories")
     if used_story_ids:
-        print(f"   Used story IDs: {used_story_ids[:5]}{'...' if len(used_story_ids) > 5 else ''}")
+        print(f"   Used story IDs: {list(used_story_ids)[:5]}{'...' if len(used_story_ids) > 5 else ''}")
 
     # Step 2: Get processed stories (excluding previously used)
     print("\nFetching fresh processed stories...")
@@ -222,6 +246,7 @@ def main():
         print(f"        ID: {story_id}")
         print(f"        Topics: {', '.join(story.get('topics', []))}")
         print(f"        Relevance: {story.get('relevance_score', 0):.2f}")
+        print(f"        Sources covering: {story.get('coverage_count') or 1}")
         print()
 
     # Check for duplicates within selection
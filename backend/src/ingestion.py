@@ -8,7 +8,7 @@ import sys
 import json
 import hashlib
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
 
 import feedparser
@@ -17,7 +17,22 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 import dateparser
 
+import resilience
+from ranking import rank_new_story, boost_coverage
+from recorder import wrap_client, fetch_feed, generate_text, record_clock
 from sources import TRUSTED_SOURCES, RELEVANT_KEYWORDS, TOPICS
+from scheduler import (
+    GEMINI_DAILY_BUDGET,
+    DAEMON_TICK_SECONDS,
+    init_schedule,
+    due_sources,
+    next_poll_at,
+    record_success,
+    record_failure,
+    classify_interval,
+    enqueue_article,
+    dequeue_article,
+)
 
 # Load environment variables
 load_dotenv()
@@ -27,10 +42,17 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 model = genai.GenerativeModel('models/gemini-flash-latest')
 
 # Configure Supabase
-supabase: Client = create_client(
+supabase: Client = wrap_client(create_client(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_KEY")
-)
+))
+
+
+# Articles scoring below this are not saved
+MIN_RELEVANCE_SCORE = 0.6
+
+# Daemon gives up on an article after this many failed classifications
+MAX_CLASSIFY_ATTEMPTS = 3
 
 
 def get_url_hash(url: str) -> str:
@@ -65,15 +87,87 @@ def contains_relevant_keywords(text: str) -> bool:
 
 
 def check_duplicate(url: str) -> bool:
-    """Check if URL already exists in database"""
+    """Check if URL already exists in database, as a story or as an already classified article"""
     try:
         result = supabase.table("stories").select("id").eq("url", url).execute()
+        if result.data:
+            return True
+
+        # Rejected and failed articles are recorded in the queue so they aren't classified again
+        result = supabase.table("article_queue") \
+            .select("id") \
+            .eq("url", url) \
+            .in_("status", ["done", "failed"]) \
+            .execute()
         return len(result.data) > 0
     except Exception as e:
         print(f"Error checking duplicate: {e}")
         return False
 
 
+def mark_classified(article: Dict, status: str) -> None:
+    """Record an article that won't become a story ('done' = rejected, 'failed' = gave up)"""
+    try:
+        row = {
+            "url": article["url"],
+            "article": article,
+            "status": status,
+            "completed_at": datetime.now().isoformat(),
+        }
+        resilience.call("supabase", lambda: supabase.table("article_queue").upsert(row, on_conflict="url").execute())
+    except Exception as e:
+        print(f"    [ERROR] Error recording classified article: {e}")
+
+
+def fetch_feed_entries(source: Dict) -> List:
+    """Fetch raw feed entries for a single source"""
+    def fetch():
+        feed_input, response_headers = fetch_feed(source['rss_url'])
+        feed = feedparser.parse(feed_input, response_headers=response_headers)
+
+        # feedparser doesn't raise on parse errors (e.g. an HTML error page)
+        if feed.bozo and not feed.entries:
+            raise resilience.TransientError(f"Feed error: {feed.get('bozo_exception', 'unknown')}")
+
+        return feed.entries
+
+    return resilience.call(f"feed:{source['domain']}", fetch)
+
+
+def extract_articles(source: Dict, entries: List) -> List[Dict]:
+    """Turn feed entries into new, relevant articles"""
+    articles = []
+
+    for entry in entries[:15]:  # Top 15 per source
+        # Extract data
+        article = {
+            "title": entry.get("title", ""),
+            "url": entry.get("link", ""),
+            "summary": entry.get("summary", entry.get("description", "")),
+            "published": entry.get("published", ""),
+            "source_name": source["name"],
+            "source_domain": source["domain"],
+            "trust_score": source["trust_score"],
+        }
+
+        # Filter: Check if recent (7 days for testing)
+        if not is_recent(article["published"], hours=168):
+            continue
+
+        # Filter: Check if contains relevant keywords
+        combined_text = f"{article['title']} {article['summary']}"
+        if not contains_relevant_keywords(combined_text):
+            continue
+
+        # Filter: Check for duplicates
+        if check_duplicate(article["url"]):
+            continue
+
+        articles.append(article)
+
+    return articles
+
+
 def fetch_articles() -> List[Dict]:
     """Fetch articles from all trusted sources"""
     print(f"Fetching articles from {len(TRUSTED_SOURCES)} sources...")
@@ -83,36 +177,10 @@ def fetch_articles() -> List[Dict]:
     for source in TRUSTED_SOURCES:
         try:
             print(f"  Fetching from {source['name']}...")
-            feed = feedparser.parse(source['rss_url'])
+            articles = extract_articles(source, fetch_feed_entries(source))
+            all_articles.extend(articles)
 
-            for entry in feed.entries[:15]:  # Top 15 per source
-                # Extract data
-                article = {
-                    "title": entry.get("title", ""),
-                    "url": entry.get("link", ""),
-                    "summary": entry.get("summary", entry.get("description", "")),
-                    "published": entry.get("published", ""),
-                    "source_name": source["name"],
-                    "source_domain": source["domain"],
-                    "trust_score": source["trust_score"],
-                }
-
-                # Filter: Check if recent (7 days for testing)
-                if not is_recent(article["published"], hours=168):
-                    continue
-
-                # Filter: Check if contains relevant keywords
-                combined_text = f"{article['title']} {article['summary']}"
-                if not contains_relevant_keywords(combined_text):
-                    continue
-
-                # Filter: Check for duplicates
-                if check_duplicate(article["url"]):
-                    continue
-
-                all_articles.append(article)
-
-            print(f"    [OK] Found {len([a for a in all_articles if a['source_name'] == source['name']])} relevant articles")
+            print(f"    [OK] Found {len(articles)} relevant articles")
 
         except Exception as e:
             print(f"    [ERROR] Error fetching from {source['name']}: {e}")
@@ -163,10 +231,14 @@ Respond in JSON format:
 """
 
     try:
-        response = model.generate_content(prompt)
+        # Each attempt is captured, so replay retries where the captured run did
+        response_text = resilience.call(
+            "gemini",
+            lambda: generate_text(prompt, lambda: model.generate_content(prompt).text),
+        )
 
         # Extract JSON from response
-        response_text = response.text.strip()
+        response_text = response_text.strip()
 
         # Remove markdown code blocks if present
         if response_text.startswith("```json"):
@@ -189,24 +261,31 @@ Respond in JSON format:
         return None
 
 
+def build_story_record(article: Dict, analysis: Dict) -> Dict:
+    """Build the stories row for a processed article"""
+    return {
+        "title": article["title"],
+        "url": article["url"],
+        "source": article["source_name"],
+        "source_domain": article["source_domain"],
+        "raw_content": article["summary"][:2000],  # Limit size
+        "summary": analysis["summary"],
+        "topics": analysis["topics"],
+        "trust_score": article["trust_score"],
+        "relevance_score": analysis["relevance_score"],
+        "published_at": article["published"],
+        "status": "processed",
+    }
+
+
 def save_to_database(article: Dict, analysis: Dict) -> bool:
     """Save processed article to Supabase"""
     try:
-        data = {
-            "title": article["title"],
-            "url": article["url"],
-            "source": article["source_name"],
-            "source_domain": article["source_domain"],
-            "raw_content": article["summary"][:2000],  # Limit size
-            "summary": analysis["summary"],
-            "topics": analysis["topics"],
-            "trust_score": article["trust_score"],
-            "relevance_score": analysis["relevance_score"],
-            "published_at": article["published"],
-            "status": "processed",
-        }
+        data = build_story_record(article, analysis)
+        matches = rank_new_story(data)
 
-        supabase.table("stories").insert(data).execute()
+        resilience.call("supabase", lambda: supabase.table("stories").insert(data).execute())
+        boost_coverage(data, matches)
         return True
 
     except Exception as e:
@@ -214,6 +293,104 @@ def save_to_database(article: Dict, analysis: Dict) -> bool:
         return False
 
 
+def process_article(article: Dict) -> str:
+    """
+    Classify an article with Gemini and save it if relevant.
+
+    Returns "saved", "rejected" (recorded so it isn't classified again) or
+    "failed" (Gemini or the database write failed; safe to retry).
+    """
+    analysis = process_with_gemini(article)
+
+    if not analysis:
+        return "failed"
+
+    # Only save articles with relevance score >= 0.6
+    if analysis["relevance_score"] < MIN_RELEVANCE_SCORE:
+        print(f"    [SKIP] Skipped (relevance: {analysis['relevance_score']:.2f})")
+        mark_classified(article, "done")
+        return "rejected"
+
+    # Save to database
+    if save_to_database(article, analysis):
+        print(f"    [OK] Saved (relevance: {analysis['relevance_score']:.2f})")
+        return "saved"
+
+    return "failed"
+
+
+def run_daemon():
+    """
+    Long-running ingestion: poll each source on its own adaptive interval and
+    spread Gemini classification across the day within the daily budget.
+    """
+    print("=" * 60)
+    print("Daily Tech Brief - Ingestion Daemon")
+    print("=" * 60)
+    print()
+
+    schedule = init_schedule(TRUSTED_SOURCES)
+    queue = []
+    queued_urls = set()
+    failed_attempts = {}
+    budget = {"day": date.today(), "used": 0}
+    next_classify = 0.0
+
+    print(f"Polling {len(TRUSTED_SOURCES)} sources, "
+          f"classifying up to {GEMINI_DAILY_BUDGET} articles/day "
+          f"(one every {classify_interval():.0f}s)")
+
+    while True:
+        now = time.time()
+
+        # Poll sources that are due
+        for source in due_sources(schedule, TRUSTED_SOURCES, now):
+            state = schedule[source["name"]]
+            try:
+                entries = fetch_feed_entries(source)
+                new_articles = [
+                    a for a in extract_articles(source, entries)
+                    if a["url"] not in queued_urls
+                ]
+                for article in new_articles:
+                    enqueue_article(queue, article)
+                    queued_urls.add(article["url"])
+
+                record_success(state, entries, now)
+                print(f"  [OK] {source['name']}: {len(new_articles)} new, "
+                      f"next poll in {state['interval'] / 60:.0f} min")
+            except Exception as e:
+                record_failure(state, now)
+                print(f"  [ERROR] {source['name']}: {e} "
+                      f"(retry in {state['interval'] / 60:.0f} min)")
+
+        # Reset the classification budget at midnight
+        if budget["day"] != date.today():
+            budget = {"day": date.today(), "used": 0}
+            failed_attempts = {}
+
+        # Classify one queued article if the budget allows
+        if (queue and now >= next_classify and budget["used"] < GEMINI_DAILY_BUDGET
+                and not resilience.is_open("gemini")):
+            article = dequeue_article(queue)
+            queued_urls.discard(article["url"])
+
+            # Skip articles that went stale or were saved elsewhere while queued
+            if is_recent(article["published"], hours=168) and not check_duplicate(article["url"]):
+                print(f"\n  Processing: {article['title'][:60]}... ({len(queue)} queued)")
+                status = process_article(article)
+                budget["used"] += 1
+                next_classify = now + classify_interval()
+
+                # Failed articles are re-queued by the next poll, up to a limit
+                if status == "failed":
+                    failed_attempts[article["url"]] = failed_attempts.get(article["url"], 0) + 1
+                    if failed_attempts[article["url"]] >= MAX_CLASSIFY_ATTEMPTS:
+                        mark_classified(article, "failed")
+
+        time.sleep(max(1.0, min(next_poll_at(schedule) - time.time(), DAEMON_TICK_SECONDS)))
+
+
 def main():
     """Main ingestion workflow"""
     print("=" * 60)
@@ -221,6 +398,8 @@ def main():
     print("=" * 60)
     print()
 
+    record_clock("ingestion")
+
     # Step 1: Fetch articles
     articles = fetch_articles()
 
@@ -257,6 +436,11 @@ def main():
     articles = diverse_articles
 
     for i, article in enumerate(articles[:25], 1):
+        # Stop early instead of waiting out each call while Gemini is down
+        if resilience.is_open("gemini"):
+            print("\n  [ERROR] Gemini circuit breaker is open, skipping remaining articles")
+            break
+
         print(f"\n  [{i}/25] Processing: {article['title'][:60]}...")
 
         # Add delay to respect rate limits (5 requests/minute = 1 request every 12 seconds)
@@ -264,20 +448,8 @@ def main():
             print("    [WAIT] Waiting 12 seconds for rate limit...")
             time.sleep(12)
 
-        analysis = process_with_gemini(article)
-
-        if not analysis:
-            continue
-
-        # Only save articles with relevance score >= 0.6
-        if analysis["relevance_score"] < 0.6:
-            print(f"    [SKIP] Skipped (relevance: {analysis['relevance_score']:.2f})")
-            continue
-
-        # Save to database
-        if save_to_database(article, analysis):
+        if process_article(article) == "saved":
             processed_count += 1
-            print(f"    [OK] Saved (relevance: {analysis['relevance_score']:.2f})")
 
     print(f"\n{'=' * 60}")
     print(f"Ingestion complete!")
@@ -287,4 +459,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if "--daemon" in sys.argv:
+        run_daemon()
+    else:
+        main()
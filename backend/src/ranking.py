@@ -0,0 +1,179 @@
+"""
+Story ranking for Daily Tech Brief
+Combines LLM relevance, source trust, recency and cross-source coverage into
+one score, precomputed when a story is saved
+
+A story's score at time `now` is:
+
+    (W_RELEVANCE * relevance + W_TRUST * trust)
+        * (1 + COVERAGE_BOOST * ln(coverage_count))
+        * 0.5 ** (age_hours / RANK_HALF_LIFE_HOURS)
+
+Exponential decay scales every story by the same factor as time passes, so
+the stored rank_score is the log of this score with the `now` term dropped:
+ordering by rank_score gives the same order as the decayed score at any
+moment, and rows never need re-scoring just because they got older.
+"""
+
+import os
+import re
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict
+
+import dateparser
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+import resilience
+from recorder import wrap_client
+
+# Load environment variables
+load_dotenv()
+
+# Configure Supabase
+supabase: Client = wrap_client(create_client(
+    os.getenv("SUPABASE_URL"),
+    os.getenv("SUPABASE_KEY")
+))
+
+# Score weights
+W_RELEVANCE = 0.7
+W_TRUST = 0.3
+COVERAGE_BOOST = 0.25
+RANK_HALF_LIFE_HOURS = float(os.getenv("RANK_HALF_LIFE_HOURS", "24"))
+
+# Coverage matching: stories from other sources in this window whose titles overlap enough.
+# Short headlines reach the threshold on two common words ("apple", "iphone"),
+# so a match also needs a minimum number of shared words.
+COVERAGE_WINDOW_HOURS = 48
+TITLE_SIMILARITY_THRESHOLD = 0.4
+MIN_SHARED_TITLE_TOKENS = 3
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "about",
+    "after", "over", "says", "will", "what", "your", "have", "has", "new",
+}
+
+
+def title_tokens(title: str) -> set:
+    """Get the salient words of a title"""
+    words = re.findall(r"[a-z0-9]+", title.lower())
+    return {word for word in words if len(word) > 2 and word not in STOPWORDS}
+
+
+def title_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of two titles' salient words"""
+    tokens_a, tokens_b = title_tokens(a), title_tokens(b)
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def is_same_story(a: str, b: str) -> bool:
+    """Check if two titles likely report the same news"""
+    shared = title_tokens(a) & title_tokens(b)
+    return len(shared) >= MIN_SHARED_TITLE_TOKENS and title_similarity(a, b) >= TITLE_SIMILARITY_THRESHOLD
+
+
+def published_timestamp(published_at: str) -> float:
+    """Parse a published date to a UTC timestamp, defaulting to now"""
+    parsed = None
+    if published_at:
+        parsed = dateparser.parse(
+            str(published_at),
+            settings={"TO_TIMEZONE": "UTC", "RETURN_AS_TIMEZONE_AWARE": True},
+        )
+
+    if not parsed:
+        return datetime.now(timezone.utc).timestamp()
+    return parsed.timestamp()
+
+
+def compute_rank_score(story: Dict) -> float:
+    """Compute a story's time-invariant rank score"""
+    base = W_RELEVANCE * story.get("relevance_score", 0.0) + W_TRUST * story.get("trust_score", 0.0)
+    boost = 1 + COVERAGE_BOOST * math.log(max(story.get("coverage_count") or 1, 1))
+    decay_seconds = RANK_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+    return math.log(max(base * boost, 1e-6)) + published_timestamp(story.get("published_at")) / decay_seconds
+
+
+def find_coverage(story: Dict) -> List[Dict]:
+    """Find recent stories from other sources that report the same news"""
+    try:
+        cutoff_date = (datetime.now() - timedelta(hours=COVERAGE_WINDOW_HOURS)).isoformat()
+        result = supabase.table("stories") \
+            .select("id, title, source") \
+            .eq("status", "processed") \
+            .gte("created_at", cutoff_date) \
+            .neq("source", story["source"]) \
+            .execute()
+
+        return [
+            other for other in result.data
+            if is_same_story(story["title"], other["title"])
+        ]
+    except Exception as e:
+        print(f"    [ERROR] Error finding coverage: {e}")
+        return []
+
+
+def rank_new_story(story: Dict) -> List[Dict]:
+    """
+    Set coverage_count and rank_score on a story about to be saved.
+
+    Returns the matching stories from other sources, whose coverage should be
+    boosted with boost_coverage() once the new story is saved.
+    """
+    matches = find_coverage(story)
+    story["coverage_sources"] = sorted({match["source"] for match in matches})
+    story["coverage_count"] = 1 + len(story["coverage_sources"])
+    story["rank_score"] = compute_rank_score(story)
+    return matches
+
+
+def boost_coverage(story: Dict, matches: List[Dict]) -> None:
+    """
+    Count the new story's source as covering each matched story.
+
+    Done in SQL (add_coverage_source) so concurrent workers don't lose
+    updates and a source is only counted once per story. The score is
+    shifted by the change in the coverage term alone, leaving the recency
+    term computed at insert time untouched.
+    """
+    for match in matches:
+        try:
+            resilience.call("supabase", lambda: supabase.rpc("add_coverage_source", {
+                "p_story_id": match["id"],
+                "p_source": story["source"],
+                "p_coverage_boost": COVERAGE_BOOST,
+            }).execute())
+        except Exception as e:
+            print(f"    [ERROR] Error boosting coverage: {e}")
+
+
+def main():
+    """Backfill rank scores for processed stories that don't have one"""
+    print("=" * 60)
+    print("Daily Tech Brief - Rank Score Backfill")
+    print("=" * 60)
+    print()
+
+    result = supabase.table("stories") \
+        .select("id, relevance_score, trust_score, published_at, coverage_count") \
+        .eq("status", "processed") \
+        .is_("rank_score", "null") \
+        .execute()
+
+    for story in result.data:
+        supabase.table("stories") \
+            .update({"rank_score": compute_rank_score(story)}) \
+            .eq("id", story["id"]) \
+            .execute()
+
+    print(f"[OK] Scored {len(result.data)} stories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Record/replay of pipeline inputs
+In capture mode, raw feed bytes, Gemini prompts/responses and Supabase query
+results are written to a content-addressed run bundle. In replay mode they are
+served back from the bundle without touching the network.
+
+Failed calls are captured too, and replayed as ReplayedError, and so are
+run-dependent decisions such as circuit breaker state and the retry budget
+(see resilience.py), so a replayed run retries and gives up exactly where
+the captured run did.
+
+Configured with environment variables:
+    RUN_MODE    live (default), capture or replay
+    RUN_BUNDLE  bundle directory
+
+Bundle layout:
+    <RUN_BUNDLE>/index.jsonl                 one entry per recorded call, in call order
+    <RUN_BUNDLE>/objects/ab/abcdef....gz     gzipped payloads, named by SHA-256
+"""
+
+import os
+import json
+import gzip
+import hashlib
+from datetime import datetime
+from types import SimpleNamespace
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import feedparser
+import requests
+
+RUN_MODE = os.getenv("RUN_MODE", "live")
+RUN_BUNDLE = os.getenv("RUN_BUNDLE", "")
+
+FEED_TIMEOUT_SECONDS = 30
+
+_replay_queues: Optional[Dict[str, deque]] = None
+
+
+class ReplayMissError(RuntimeError):
+    """Raised when a replayed run makes a call that was not captured"""
+
+
+class ReplayedError(RuntimeError):
+    """Raised when a replayed run makes a call that failed when captured"""
+
+    def __init__(self, message: str, transient: bool):
+        super().__init__(message)
+        self.transient = transient
+
+
+def is_capturing() -> bool:
+    return RUN_MODE == "capture"
+
+
+def is_replaying() -> bool:
+    return RUN_MODE == "replay"
+
+
+def store_object(payload: bytes) -> str:
+    """Store a payload in the bundle, returning its content hash"""
+    digest = hashlib.sha256(payload).hexdigest()
+    path = os.path.join(RUN_BUNDLE, "objects", digest[:2], f"{digest}.gz")
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, "wb") as f:
+            f.write(payload)
+
+    return digest
+
+
+def load_object(digest: str) -> bytes:
+    """Load a payload from the bundle by content hash"""
+    path = os.path.join(RUN_BUNDLE, "objects", digest[:2], f"{digest}.gz")
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+
+def record(kind: str, key: str, payload: bytes, **extra) -> None:
+    """Append a captured call to the bundle index"""
+    entry = {"kind": kind, "key": key, "object": store_object(payload), **extra}
+
+    os.makedirs(RUN_BUNDLE, exist_ok=True)
+    with open(os.path.join(RUN_BUNDLE, "index.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def record_error(kind: str, key: str, error: Exception) -> None:
+    """Capture a failed call, so replay fails it the same way"""
+    # Imported here: resilience itself imports this module
+    from resilience import is_transient
+
+    record(kind, key, repr(error).encode(), error=True, transient=is_transient(error))
+
+
+def replay_entry(kind: str, key: str) -> Dict:
+    """
+    Get the next captured index entry for a call, in capture order.
+
+    Raises ReplayedError if the captured call failed.
+    """
+    global _replay_queues
+
+    if _replay_queues is None:
+        _replay_queues = defaultdict(deque)
+        with open(os.path.join(RUN_BUNDLE, "index.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                _replay_queues[f"{entry['kind']}:{entry['key']}"].append(entry)
+
+    queue = _replay_queues.get(f"{kind}:{key}")
+    if not queue:
+        raise ReplayMissError(f"No captured {kind} call for {key}")
+
+    entry = queue.popleft()
+    if entry.get("error"):
+        raise ReplayedError(load_object(entry["object"]).decode(), entry["transient"])
+    return entry
+
+
+def replay(kind: str, key: str) -> bytes:
+    """Get the next captured payload for a call, in capture order"""
+    return load_object(replay_entry(kind, key)["object"])
+
+
+def record_clock(step: str) -> None:
+    """Capture the wall clock at the start of a pipeline step"""
+    if is_capturing():
+        record("clock", step, datetime.now().isoformat().encode())
+
+
+def replay_clock(step: str) -> datetime:
+    """Get the captured wall clock of a pipeline step"""
+    return datetime.fromisoformat(replay("clock", step).decode())
+
+
+def fetch_feed(url: str) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Get the raw bytes and response headers to pass to feedparser.parse() for a feed.
+
+    Feeds are fetched here, with a timeout, rather than by feedparser, whose
+    fetch can hang forever on a stalled server. The response headers are
+    passed on so feedparser's content-type and encoding detection still
+    applies. Capture runs also record both; replay runs serve them back.
+    """
+    if is_replaying():
+        entry = replay_entry("feed", url)
+        return load_object(entry["object"]), json.loads(load_object(entry["headers"]))
+
+    # Identify as feedparser would; some feeds reject other user agents.
+    # HTTP errors are left to feedparser, which flags unparseable pages.
+    try:
+        response = requests.get(
+            url,
+            headers={"User-Agent": feedparser.USER_AGENT},
+            timeout=FEED_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        if is_capturing():
+            record_error("feed", url, e)
+        raise
+
+    headers = {name.lower(): value for name, value in response.headers.items()}
+    if is_capturing():
+        record("feed", url, response.content, headers=store_object(json.dumps(headers).encode()))
+    return response.content, headers
+
+
+def generate_text(prompt: str, call: Callable[[], str]) -> str:
+    """Run an LLM call, capturing or replaying its response keyed by prompt hash"""
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+
+    if is_replaying():
+        return replay("llm", key).decode()
+
+    try:
+        text = call()
+    except Exception as e:
+        if is_capturing():
+            record_error("llm", key, e)
+        raise
+
+    if is_capturing():
+        record("llm", key, text.encode(), prompt=store_object(prompt.encode()))
+    return text
+
+
+def recorded_decision(key: str, decide: Callable[[], bool]) -> bool:
+    """Make a decision that depends on local state or timing, capturing or replaying it"""
+    if is_replaying():
+        return json.loads(replay("decision", key))
+
+    decision = decide()
+    if is_capturing():
+        record("decision", key, json.dumps(decision).encode())
+    return decision
+
+
+class RecordedQuery:
+    """
+    Proxy over a Supabase client or query builder.
+
+    Method calls and attribute lookups are forwarded (or skipped, in replay)
+    and remembered; execute() captures or replays the result. Calls are keyed
+    by the chain's method names and table, not its arguments, since arguments
+    such as date cutoffs change from run to run.
+    """
+
+    def __init__(self, target: Any, chain: List[str], calls: List[str]):
+        self._target = target
+        self._chain = chain
+        self._calls = calls
+
+    def __getattr__(self, name: str) -> "RecordedQuery":
+        target = None if is_replaying() else getattr(self._target, name)
+        return RecordedQuery(target, self._chain + [name], self._calls + [name])
+
+    def __call__(self, *args, **kwargs) -> Any:
+        if self._chain[-1] == "execute":
+            return self._execute()
+
+        chain = self._chain
+        if chain[-1] in ("table", "from_", "rpc") and args:
+            chain = chain[:-1] + [f"{chain[-1]}({args[0]})"]
+
+        call = f"{self._chain[-1]}({', '.join([repr(a) for a in args] + [f'{k}={v!r}' for k, v in kwargs.items()])})"
+        target = None if is_replaying() else self._target(*args, **kwargs)
+        return RecordedQuery(target, chain, self._calls[:-1] + [call])
+
+    def _execute(self) -> SimpleNamespace:
+        key = ".".join(self._chain)
+
+        if is_replaying():
+            result = json.loads(replay("db", key))
+            return SimpleNamespace(data=result["data"], count=result["count"])
+
+        try:
+            response = self._target()
+        except Exception as e:
+            record_error("db", key, e)
+            raise
+
+        result = {"data": response.data, "count": getattr(response, "count", None)}
+        record("db", key, json.dumps(result, default=str).encode(), query=".".join(self._calls))
+        return SimpleNamespace(data=result["data"], count=result["count"])
+
+
+def wrap_client(client: Any) -> Any:
+    """Wrap a Supabase client for capture/replay; live runs get the client unchanged"""
+    if is_capturing() or is_replaying():
+        return RecordedQuery(client, [], [])
+    return client
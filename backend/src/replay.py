@@ -0,0 +1,86 @@
+"""
+Daily Tech Brief - Run Replay Script
+Re-executes ingestion and digest generation from a captured run bundle,
+with no network access, for debugging and offline profiling
+
+Usage:
+    RUN_MODE=capture RUN_BUNDLE=../runs/today python ingestion.py
+    RUN_MODE=capture RUN_BUNDLE=../runs/today python generate_digest.py
+    python replay.py ../runs/today
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, date
+from typing import Optional
+
+
+def frozen_clock(now: datetime):
+    """Build datetime/date replacements that report the captured time"""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now if tz is None else now.astimezone(tz)
+
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return now.date()
+
+    return FrozenDatetime, FrozenDate
+
+
+def run_step(module, step: str, name: str) -> Optional[float]:
+    """
+    Run a pipeline module's main() at its captured time, returning elapsed
+    seconds, or None if the step was not captured
+    """
+    import recorder
+
+    try:
+        module.datetime, module.date = frozen_clock(recorder.replay_clock(step))
+    except recorder.ReplayMissError:
+        print(f"\n[SKIP] {name} was not captured in this bundle")
+        return None
+
+    print(f"\n>>> Replaying {name}")
+    start = time.perf_counter()
+    module.main()
+    return time.perf_counter() - start
+
+
+def main():
+    """Main replay workflow"""
+    if len(sys.argv) != 2:
+        print("Usage: python replay.py <bundle_dir>")
+        sys.exit(1)
+
+    # Must be set before the pipeline modules create their clients
+    os.environ["RUN_MODE"] = "replay"
+    os.environ["RUN_BUNDLE"] = sys.argv[1]
+    os.environ.setdefault("SUPABASE_URL", "http://localhost")
+    os.environ.setdefault("SUPABASE_KEY", "replay.replay.replay")
+
+    # Rate-limit waits are not needed when nothing touches the network
+    time.sleep = lambda seconds: None
+
+    import ingestion
+    import generate_digest
+
+    timings = {
+        "ingestion": run_step(ingestion, "ingestion", "ingestion"),
+        "generate_digest": run_step(generate_digest, "generate_digest", "digest generation"),
+    }
+
+    print(f"\n{'=' * 60}")
+    print("Replay complete!")
+    for name, seconds in timings.items():
+        if seconds is not None:
+            print(f"   {name}: {seconds:.2f}s")
+    print(f"{'=' * 60}")
+
+
+if __name__ == "__main__":
+    main()
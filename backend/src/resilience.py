@@ -0,0 +1,246 @@
+"""
+Shared failure handling for external dependencies (feeds, Gemini, Supabase, SMTP)
+Each dependency has a circuit breaker whose state is persisted between runs,
+retries use jittered exponential backoff, and all retries draw from one
+refilling retry budget
+"""
+
+import os
+import json
+import time
+import random
+import smtplib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+import requests
+
+from recorder import ReplayedError, is_replaying, recorded_decision
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process locking, fine for a single process
+    fcntl = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Breaker state file, kept between runs (see the workflow cache step)
+BREAKER_STATE_FILE = os.getenv("BREAKER_STATE_FILE", "../.breaker_state.json")
+
+# Retries allowed across all dependencies: a token bucket holding up to
+# RETRY_BUDGET retries, refilled at that many per RETRY_BUDGET_WINDOW_SECONDS.
+# A one-shot run gets RETRY_BUDGET; long-running processes regain it over time.
+RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "10"))
+RETRY_BUDGET_WINDOW_SECONDS = int(os.getenv("RETRY_BUDGET_WINDOW_SECONDS", "3600"))
+
+MAX_ATTEMPTS = 3
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 20.0
+
+# Per-dependency breaker settings, by name prefix (e.g. "feed:techcrunch.com" -> "feed"):
+#   threshold: consecutive failed calls before the breaker opens
+#   cooldown:  seconds the breaker stays open before a trial call is allowed
+BREAKER_SETTINGS = {
+    "feed": {"threshold": 3, "cooldown": 24 * 60 * 60},
+    "gemini": {"threshold": 3, "cooldown": 10 * 60},
+    "supabase": {"threshold": 5, "cooldown": 60},
+    "smtp": {"threshold": 3, "cooldown": 10 * 60},
+}
+
+_retry_budget = {"tokens": float(RETRY_BUDGET), "updated": time.time()}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class TransientError(RuntimeError):
+    """Raised by callers for failures that should be retried and counted by the breaker"""
+
+
+def get_settings(dependency: str) -> Dict:
+    """Get breaker settings for a dependency"""
+    return BREAKER_SETTINGS[dependency.split(":")[0]]
+
+
+@contextmanager
+def breaker_file_lock() -> Iterator[None]:
+    """Hold an exclusive lock on the breaker state file across processes"""
+    if fcntl is None:
+        yield
+        return
+
+    with open(f"{BREAKER_STATE_FILE}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_breakers() -> Dict[str, Dict]:
+    """Load persisted breaker state (dependency -> failures, opened_at)"""
+    try:
+        with open(BREAKER_STATE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_breaker(dependency: str, update: Callable[[Dict[str, Dict]], bool]) -> None:
+    """
+    Apply a change to one dependency's breaker.
+
+    The state file is re-read under the lock so changes made by other
+    processes are kept; update returns whether anything changed.
+    """
+    try:
+        with breaker_file_lock():
+            breakers = load_breakers()
+            if not update(breakers):
+                return
+
+            tmp_path = f"{BREAKER_STATE_FILE}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(breakers, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, BREAKER_STATE_FILE)
+    except OSError as e:
+        print(f"    [ERROR] Error saving breaker state for {dependency}: {e}")
+
+
+def is_open(dependency: str) -> bool:
+    """
+    Check if a dependency's breaker is open (calls would fail fast).
+
+    Replayed runs get the answer the captured run got, not the local state.
+    """
+    return recorded_decision(f"is_open:{dependency}", lambda: check_breaker(dependency))
+
+
+def check_breaker(dependency: str) -> bool:
+    """Check the persisted breaker state of a dependency"""
+    state = load_breakers().get(dependency)
+    if not state or state.get("opened_at") is None:
+        return False
+
+    # After the cooldown the breaker is half-open: one trial call goes through
+    return time.time() - state["opened_at"] < get_settings(dependency)["cooldown"]
+
+
+def record_success(dependency: str) -> None:
+    """Close a dependency's breaker after a successful call"""
+    def close(breakers: Dict[str, Dict]) -> bool:
+        return breakers.pop(dependency, None) is not None
+
+    # Replayed runs leave the local breaker state alone
+    if is_replaying():
+        return
+
+    # Skip the lock on the common path, when there's nothing to close
+    if dependency in load_breakers():
+        update_breaker(dependency, close)
+
+
+def record_failure(dependency: str) -> None:
+    """Count a failed call, opening the breaker at the threshold"""
+    def count_failure(breakers: Dict[str, Dict]) -> bool:
+        state = breakers.setdefault(dependency, {"failures": 0, "opened_at": None})
+        state["failures"] += 1
+
+        if state["failures"] >= get_settings(dependency)["threshold"]:
+            state["opened_at"] = time.time()
+            print(f"    [ERROR] Circuit breaker opened for {dependency}")
+        return True
+
+    if is_replaying():
+        return
+
+    update_breaker(dependency, count_failure)
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Check if an error is worth retrying: transport failures, timeouts and
+    HTTP 429/5xx. Errors such as a duplicate-key insert or a blocked Gemini
+    response are not, and don't count toward the breaker.
+    """
+    if isinstance(error, (TransientError, ConnectionError, TimeoutError,
+                          requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+
+    if httpx and isinstance(error, httpx.TransportError):
+        return True
+
+    if isinstance(error, ReplayedError):
+        return error.transient
+
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+
+    # HTTP status from requests/httpx responses or Google API errors
+    status = getattr(error, "status_code", None) \
+        or getattr(getattr(error, "response", None), "status_code", None) \
+        or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status == 429 or 500 <= status < 600
+
+    return False
+
+
+def take_retry_token() -> bool:
+    """Take one retry from the shared budget; replayed runs get the captured answer"""
+    return recorded_decision("retry_token", spend_retry_token)
+
+
+def spend_retry_token() -> bool:
+    """Take one retry from the shared budget, refilling it for elapsed time"""
+    now = time.time()
+    refill = (now - _retry_budget["updated"]) * RETRY_BUDGET / RETRY_BUDGET_WINDOW_SECONDS
+    _retry_budget["tokens"] = min(float(RETRY_BUDGET), _retry_budget["tokens"] + refill)
+    _retry_budget["updated"] = now
+
+    if _retry_budget["tokens"] < 1:
+        return False
+
+    _retry_budget["tokens"] -= 1
+    return True
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+def call(dependency: str, fn: Callable[[], Any], attempts: int = MAX_ATTEMPTS) -> Any:
+    """
+    Call a dependency with retries and circuit breaking.
+
+    Raises CircuitOpenError without calling fn while the breaker is open.
+    Non-transient errors are re-raised at once; transient ones are retried
+    until attempts or the retry budget run out, then re-raised and counted
+    toward the breaker.
+    """
+    # Replayed runs go through the same retries: failed calls and breaker
+    # and budget decisions are replayed from the bundle, and sleeps are skipped
+    if is_open(dependency):
+        raise CircuitOpenError(f"Circuit breaker open for {dependency}")
+
+    for attempt in range(1, attempts + 1):
+        try:
+            result = fn()
+            record_success(dependency)
+            return result
+        except Exception as e:
+            if not is_transient(e):
+                raise
+
+            if attempt == attempts or not take_retry_token():
+                record_failure(dependency)
+                raise
+
+            time.sleep(backoff_seconds(attempt))
@@ -0,0 +1,93 @@
+"""
+Adaptive polling schedule for the ingestion daemon
+Each source is polled on its own interval, derived from how often the feed
+publishes, with exponential backoff when fetches fail
+"""
+
+import os
+import time
+import heapq
+import calendar
+from typing import List, Dict
+
+# Polling bounds (seconds)
+MIN_POLL_SECONDS = int(os.getenv("MIN_POLL_SECONDS", str(10 * 60)))
+MAX_POLL_SECONDS = int(os.getenv("MAX_POLL_SECONDS", str(6 * 60 * 60)))
+DEFAULT_POLL_SECONDS = 60 * 60
+
+# Main loop never sleeps longer than this, so queued articles keep flowing
+DAEMON_TICK_SECONDS = 30
+
+# Gemini budget: articles classified per day, and the free tier's 5 requests/minute
+GEMINI_DAILY_BUDGET = int(os.getenv("GEMINI_DAILY_BUDGET", "300"))
+GEMINI_MIN_INTERVAL_SECONDS = 12
+
+
+def init_schedule(sources: List[Dict]) -> Dict[str, Dict]:
+    """Create polling state for each source; all sources are due immediately"""
+    return {
+        source["name"]: {
+            "interval": DEFAULT_POLL_SECONDS,
+            "next_poll": 0.0,
+            "errors": 0,
+        }
+        for source in sources
+    }
+
+
+def due_sources(schedule: Dict[str, Dict], sources: List[Dict], now: float) -> List[Dict]:
+    """Get sources whose next poll time has passed"""
+    return [s for s in sources if schedule[s["name"]]["next_poll"] <= now]
+
+
+def next_poll_at(schedule: Dict[str, Dict]) -> float:
+    """Get the earliest upcoming poll time across all sources"""
+    return min(state["next_poll"] for state in schedule.values())
+
+
+def estimate_publish_interval(entries: List) -> float:
+    """Estimate the average gap between posts (seconds) from feed entry timestamps"""
+    timestamps = []
+    for entry in entries:
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        if parsed:
+            timestamps.append(calendar.timegm(parsed))
+
+    if len(timestamps) < 2:
+        return DEFAULT_POLL_SECONDS
+
+    timestamps.sort()
+    span = timestamps[-1] - timestamps[0]
+    return span / (len(timestamps) - 1)
+
+
+def record_success(state: Dict, entries: List, now: float) -> None:
+    """Adapt the polling interval to the feed's publish rate after a successful fetch"""
+    # Poll about twice per expected new post
+    interval = estimate_publish_interval(entries) / 2
+    state["interval"] = max(MIN_POLL_SECONDS, min(interval, MAX_POLL_SECONDS))
+    state["errors"] = 0
+    state["next_poll"] = now + state["interval"]
+
+
+def record_failure(state: Dict, now: float) -> None:
+    """Back off exponentially after a failed fetch"""
+    state["errors"] += 1
+    backoff = DEFAULT_POLL_SECONDS * (2 ** (state["errors"] - 1))
+    state["interval"] = max(MIN_POLL_SECONDS, min(backoff, MAX_POLL_SECONDS))
+    state["next_poll"] = now + state["interval"]
+
+
+def classify_interval() -> float:
+    """Get the minimum gap between Gemini calls that spreads the daily budget over the day"""
+    return max(GEMINI_MIN_INTERVAL_SECONDS, 24 * 60 * 60 / GEMINI_DAILY_BUDGET)
+
+
+def enqueue_article(queue: List, article: Dict) -> None:
+    """Queue an article for classification, most trusted sources first"""
+    heapq.heappush(queue, (-article["trust_score"], time.time(), article["url"], article))
+
+
+def dequeue_article(queue: List) -> Dict:
+    """Take the next article to classify"""
+    return heapq.heappop(queue)[-1]
@@ -4,15 +4,19 @@ Sends the daily digest via email using Resend
 """
 
 import os
+import html
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import date
 from typing import List, Dict
+from urllib.parse import urlparse
 
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+import resilience
+
 # Load environment variables
 load_dotenv()
 
@@ -62,15 +66,25 @@ def get_todays_digest() -> Dict:
         return None
 
 
+def safe_url(url: str) -> str:
+    """Escape a story URL for use in href, allowing only http(s) links"""
+    if urlparse(url or "").scheme.lower() not in ("http", "https"):
+        return "#"
+    return html.escape(url, quote=True)
+
+
 def generate_html_email(digest: Dict) -> str:
     """Generate HTML email content"""
 
+    # Story fields come from feeds and Gemini, so everything is escaped
+    # (this HTML is also published by static_archive.py)
     stories_html = ""
     for i, story in enumerate(digest["stories"], 1):
         topics_html = " ".join([
-            f'<span style="display: inline-block; padding: 4px 8px; margin: 2px; background-color: #e5e7eb; border-radius: 4px; font-size: 12px;">{topic}</span>'
+            f'<span style="display: inline-block; padding: 4px 8px; margin: 2px; background-color: #e5e7eb; border-radius: 4px; font-size: 12px;">{html.escape(topic)}</span>'
             for topic in story.get("topics", [])
         ])
+        url = safe_url(story['url'])
 
         stories_html += f"""
         <div style="margin-bottom: 30px; padding-bottom: 30px; border-bottom: 1px solid #e5e7eb;">
@@ -83,17 +97,17 @@ def generate_html_email(digest: Dict) -> str:
                 </div>
             </div>
             <h2 style="font-size: 20px; font-weight: 600; margin: 10px 0; color: #111827;">
-                <a href="{story['url']}" style="color: #111827; text-decoration: none;">{story['title']}</a>
+                <a href="{url}" style="color: #111827; text-decoration: none;">{html.escape(story['title'])}</a>
             </h2>
-            <p style="font-size: 14px; color: #6b7280; margin: 5px 0;">{story['source']}</p>
-            <p style="font-size: 16px; line-height: 1.6; color: #374151; margin: 15px 0;">{story['summary']}</p>
-            <a href="{story['url']}" style="color: #2563eb; text-decoration: none; font-weight: 500; font-size: 14px;">
+            <p style="font-size: 14px; color: #6b7280; margin: 5px 0;">{html.escape(story['source'])}</p>
+            <p style="font-size: 16px; line-height: 1.6; color: #374151; margin: 15px 0;">{html.escape(story['summary'] or '')}</p>
+            <a href="{url}" style="color: #2563eb; text-decoration: none; font-weight: 500; font-size: 14px;">
                 Read full article →
             </a>
         </div>
         """
 
-    formatted_date = date.today().strftime("%A, %B %d, %Y")
+    formatted_date = date.fromisoformat(digest["digest_date"]).strftime("%A, %B %d, %Y")
 
     html = f"""
     <!DOCTYPE html>
@@ -146,9 +160,12 @@ def send_email(to_email: str, digest: Dict) -> bool:
         msg.attach(html_part)
 
         # Send via Gmail SMTP
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
-            server.sendmail(GMAIL_ADDRESS, to_email, msg.as_string())
+        def send():
+            with smtplib.SMTP_SSL('smtp.gmail.com', 465, timeout=30) as server:
+                server.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
+                server.sendmail(GMAIL_ADDRESS, to_email, msg.as_string())
+
+        resilience.call("smtp", send)
 
         print(f"[OK] Email sent successfully to {to_email}")
         return True
@@ -2,6 +2,10 @@
 Trusted news sources for Daily Tech Brief
 """
 
+import os
+import json
+from typing import List, Dict
+
 TRUSTED_SOURCES = [
     # Big Tech & Product Strategy
     {
@@ -66,6 +70,22 @@ TRUSTED_SOURCES = [
     },
 ]
 
+
+def load_sources() -> List[Dict]:
+    """
+    Load the source registry.
+
+    Uses the JSON file at SOURCES_FILE (a list of dicts shaped like
+    TRUSTED_SOURCES) when set, otherwise the built-in list.
+    """
+    sources_file = os.getenv("SOURCES_FILE")
+    if not sources_file:
+        return TRUSTED_SOURCES
+
+    with open(sources_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
 # Keywords for filtering relevant content
 RELEVANT_KEYWORDS = [
     # Big Tech
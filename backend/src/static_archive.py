@@ -0,0 +1,207 @@
+"""
+Daily Tech Brief - Static Archive Builder
+Renders each digest to static HTML/JSON plus an archive index, so readers can
+be served from disk or a CDN without querying Supabase
+
+Rebuilds are incremental: a digest is only re-rendered when the hash of its
+content changes. Every file is also written pre-compressed (.gz, and .br when
+the brotli package is installed).
+"""
+
+import os
+import json
+import gzip
+import html
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Dict
+
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+from send_email import generate_html_email
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Load environment variables
+load_dotenv()
+
+# Configure Supabase
+supabase: Client = create_client(
+    os.getenv("SUPABASE_URL"),
+    os.getenv("SUPABASE_KEY")
+)
+
+# Output configuration
+STATIC_DIR = os.getenv("STATIC_DIR", "../../frontend/public/archive")
+STATIC_REBUILD_DAYS = int(os.getenv("STATIC_REBUILD_DAYS", "7"))
+MANIFEST_FILE = "manifest.json"
+
+# Story fields published in the static archive
+PUBLIC_STORY_FIELDS = [
+    "id", "title", "url", "source", "source_domain", "summary",
+    "topics", "trust_score", "relevance_score", "published_at", "created_at",
+]
+
+
+def write_file(relative_path: str, content: str) -> None:
+    """Write a file and its pre-compressed variants atomically"""
+    path = os.path.join(STATIC_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = content.encode("utf-8")
+
+    variants = {path: data, f"{path}.gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        variants[f"{path}.br"] = brotli.compress(data)
+
+    for variant_path, variant_data in variants.items():
+        tmp_path = f"{variant_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(variant_data)
+        os.replace(tmp_path, variant_path)
+
+
+def load_manifest() -> Dict[str, Dict]:
+    """Load the manifest of built digests (digest_date -> hash and summary)"""
+    path = os.path.join(STATIC_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, Dict]) -> None:
+    """Save the manifest of built digests"""
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    tmp_path = os.path.join(STATIC_DIR, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(STATIC_DIR, MANIFEST_FILE))
+
+
+def content_hash(digest: Dict) -> str:
+    """Hash the published content of a digest"""
+    return hashlib.sha256(json.dumps(digest, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_recent_digests(days: int = STATIC_REBUILD_DAYS) -> List[Dict]:
+    """Get recent digests with their stories, in digest order"""
+    try:
+        cutoff_date = (datetime.now() - timedelta(days=days)).date().isoformat()
+        digests = supabase.table("daily_digests") \
+            .select("id, digest_date, story_ids, status, created_at") \
+            .gte("digest_date", cutoff_date) \
+            .order("digest_date", desc=True) \
+            .execute().data
+
+        story_ids = list({story_id for digest in digests for story_id in digest["story_ids"]})
+        if not story_ids:
+            return []
+
+        stories = supabase.table("stories") \
+            .select(", ".join(PUBLIC_STORY_FIELDS)) \
+            .in_("id", story_ids) \
+            .execute().data
+        stories_dict = {story["id"]: story for story in stories}
+
+        result = []
+        for digest in digests:
+            # Skip digests whose stories were archived; their pages are already built
+            if not all(story_id in stories_dict for story_id in digest["story_ids"]):
+                continue
+
+            # Same shape as the frontend's DailyDigest
+            result.append({
+                **digest,
+                "stories": [stories_dict[story_id] for story_id in digest["story_ids"]],
+            })
+
+        return result
+
+    except Exception as e:
+        print(f"Error fetching digests: {e}")
+        return []
+
+
+def build_index(manifest: Dict[str, Dict]) -> None:
+    """Write the archive index (JSON and HTML) and latest.json"""
+    entries = [
+        {"digest_date": digest_date, **info}
+        for digest_date, info in sorted(manifest.items(), reverse=True)
+    ]
+    write_file("index.json", json.dumps(entries, indent=2))
+
+    items_html = "".join(
+        f'<li style="margin: 10px 0;"><a href="digests/{entry["digest_date"]}.html" '
+        f'style="color: #111827; font-weight: 600;">{entry["digest_date"]}</a> '
+        f'<span style="color: #6b7280;">({entry["story_count"]} stories) '
+        f'{html.escape(entry["lead_title"])}</span></li>'
+        for entry in entries
+    )
+    write_file("index.html", f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Daily Tech Brief - Archive</title>
+</head>
+<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 30px;">
+    <h1 style="font-size: 28px; color: #111827;">Daily Tech Brief - Archive</h1>
+    <ul style="list-style: none; padding: 0;">{items_html}</ul>
+</body>
+</html>
+""")
+
+    if entries:
+        latest_path = os.path.join(STATIC_DIR, "digests", f"{entries[0]['digest_date']}.json")
+        with open(latest_path, encoding="utf-8") as f:
+            write_file("latest.json", f.read())
+
+
+def main():
+    """Main static archive workflow"""
+    print("=" * 60)
+    print("Daily Tech Brief - Static Archive")
+    print("=" * 60)
+    print()
+
+    manifest = load_manifest()
+
+    print(f"Fetching digests from the last {STATIC_REBUILD_DAYS} days...")
+    digests = get_recent_digests()
+    print(f"   Found {len(digests)} digests")
+
+    # Only render digests whose content changed since the last build
+    built = 0
+    for digest in digests:
+        digest_date = digest["digest_date"]
+        digest_hash = content_hash(digest)
+
+        if manifest.get(digest_date, {}).get("hash") == digest_hash:
+            continue
+
+        write_file(f"digests/{digest_date}.json", json.dumps(digest, indent=2, default=str))
+        write_file(f"digests/{digest_date}.html", generate_html_email(digest))
+        manifest[digest_date] = {
+            "hash": digest_hash,
+            "story_count": len(digest["stories"]),
+            "lead_title": digest["stories"][0]["title"] if digest["stories"] else "",
+        }
+        built += 1
+        print(f"   [OK] Built {digest_date}")
+
+    if built:
+        build_index(manifest)
+        save_manifest(manifest)
+
+    print(f"\n{'=' * 60}")
+    print(f"Static archive complete! ({built} digests rebuilt, {len(manifest)} total)")
+    print(f"{'=' * 60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Daily Tech Brief - Sharded Ingestion Worker
+Claims sources and articles from lease queues in Supabase, so any number of
+workers (processes or machines) can share the ingestion load
+"""
+
+import os
+import time
+import socket
+import argparse
+import threading
+import multiprocessing
+from typing import List, Dict
+
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+import resilience
+from ranking import rank_new_story, boost_coverage
+from sources import load_sources
+from scheduler import classify_interval, record_success, record_failure
+from ingestion import (
+    MIN_RELEVANCE_SCORE,
+    fetch_feed_entries,
+    extract_articles,
+    process_with_gemini,
+    build_story_record,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Configure Supabase
+supabase: Client = create_client(
+    os.getenv("SUPABASE_URL"),
+    os.getenv("SUPABASE_KEY")
+)
+
+# Lease configuration (seconds)
+LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", "120"))
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+IDLE_SLEEP_SECONDS = 30
+
+# Total worker processes sharing one Gemini key, across all machines
+# (defaults to --processes). Each process spaces its Gemini calls so the
+# whole fleet stays within the rate limit and GEMINI_DAILY_BUDGET.
+WORKER_FLEET_SIZE = os.getenv("WORKER_FLEET_SIZE")
+
+SOURCES_PER_CLAIM = 3
+MAX_ARTICLE_ATTEMPTS = 3
+
+
+def sync_sources() -> int:
+    """Upsert the source registry into the sources table"""
+    rows = [
+        {
+            "name": source["name"],
+            "domain": source["domain"],
+            "rss_url": source["rss_url"],
+            "trust_score": source["trust_score"],
+        }
+        for source in load_sources()
+    ]
+
+    resilience.call("supabase", lambda: supabase.table("sources").upsert(rows, on_conflict="name").execute())
+    return len(rows)
+
+
+def heartbeat(worker_id: str, stop: threading.Event) -> None:
+    """Keep this worker's leases alive until stopped"""
+    while not stop.wait(HEARTBEAT_SECONDS):
+        try:
+            resilience.call("supabase", lambda: supabase.rpc("heartbeat_leases", {
+                "p_worker": worker_id,
+                "p_lease_seconds": LEASE_SECONDS,
+            }).execute())
+        except Exception as e:
+            print(f"  [{worker_id}] [ERROR] Heartbeat failed: {e}")
+
+
+def enqueue_articles(articles: List[Dict]) -> None:
+    """Add articles to the classification queue, ignoring URLs already queued"""
+    if not articles:
+        return
+
+    rows = [{"url": article["url"], "article": article} for article in articles]
+    resilience.call("supabase", lambda: supabase.table("article_queue")
+                    .upsert(rows, on_conflict="url", ignore_duplicates=True)
+                    .execute())
+
+
+def release_source(worker_id: str, source: Dict, state: Dict) -> None:
+    """Release a source lease and schedule its next poll"""
+    resilience.call("supabase", lambda: supabase.rpc("release_source", {
+        "p_name": source["name"],
+        "p_worker": worker_id,
+        "p_interval_seconds": int(state["interval"]),
+        "p_errors": state["errors"],
+    }).execute())
+
+
+def poll_sources(worker_id: str) -> int:
+    """Claim due sources, fetch them and queue new articles"""
+    # Claims are not retried: if a claim's response is lost, retrying would
+    # lease more rows while the first ones are kept alive by the heartbeat
+    claimed = resilience.call("supabase", lambda: supabase.rpc("claim_sources", {
+        "p_worker": worker_id,
+        "p_limit": SOURCES_PER_CLAIM,
+        "p_lease_seconds": LEASE_SECONDS,
+    }).execute(), attempts=1).data
+
+    # The heartbeat keeps leases alive, so every claimed source must be released
+    unreleased = {source["name"]: source for source in claimed}
+    try:
+        for source in claimed:
+            state = {
+                "interval": source["poll_interval_seconds"],
+                "errors": source["consecutive_errors"],
+                "next_poll": 0.0,
+            }
+
+            try:
+                entries = fetch_feed_entries(source)
+                articles = extract_articles(source, entries)
+                enqueue_articles(articles)
+                record_success(state, entries, time.time())
+                print(f"  [{worker_id}] [OK] {source['name']}: queued {len(articles)} articles")
+            except Exception as e:
+                record_failure(state, time.time())
+                print(f"  [{worker_id}] [ERROR] {source['name']}: {e}")
+
+            release_source(worker_id, source, state)
+            del unreleased[source["name"]]
+    finally:
+        for source in unreleased.values():
+            try:
+                release_source(worker_id, source, {
+                    "interval": source["poll_interval_seconds"],
+                    "errors": source["consecutive_errors"],
+                })
+            except Exception as e:
+                print(f"  [{worker_id}] [ERROR] Error releasing {source['name']}: {e}")
+
+    return len(claimed)
+
+
+def release_article(worker_id: str, row: Dict, refund: bool = False) -> None:
+    """
+    Give up a claimed article so it can be retried (or marked failed).
+
+    With refund, the claim doesn't count toward MAX_ARTICLE_ATTEMPTS, for
+    failures caused by a Gemini outage rather than the article itself.
+    """
+    try:
+        resilience.call("supabase", lambda: supabase.rpc("release_article", {
+            "p_id": row["id"],
+            "p_worker": worker_id,
+            "p_max_attempts": MAX_ARTICLE_ATTEMPTS,
+            "p_refund": refund,
+        }).execute())
+    except Exception as e:
+        print(f"  [{worker_id}] [ERROR] Error releasing article {row['url']}: {e}")
+
+
+def classify_articles(worker_id: str, last_call: List[float], call_interval: float) -> int:
+    """Claim a queued article, classify it and complete it, once the next Gemini slot is due"""
+    # Respect this process's share of the Gemini rate limit and daily budget.
+    # Nothing is claimed before the slot, so no lease is held while waiting.
+    if time.time() < last_call[0] + call_interval:
+        return 0
+
+    # Leave the queue alone while Gemini is down, so outages don't use up attempts
+    if resilience.is_open("gemini"):
+        return 0
+
+    # Not retried, like claim_sources
+    claimed = resilience.call("supabase", lambda: supabase.rpc("claim_articles", {
+        "p_worker": worker_id,
+        "p_limit": 1,
+        "p_lease_seconds": LEASE_SECONDS,
+        "p_max_attempts": MAX_ARTICLE_ATTEMPTS,
+    }).execute(), attempts=1).data
+
+    for row in claimed:
+        article = row["article"]
+        last_call[0] = time.time()
+
+        try:
+            analysis = process_with_gemini(article)
+            if not analysis:
+                release_article(worker_id, row, refund=resilience.is_open("gemini"))
+                continue
+
+            story = None
+            matches = []
+            if analysis["relevance_score"] >= MIN_RELEVANCE_SCORE:
+                story = build_story_record(article, analysis)
+                matches = rank_new_story(story)
+
+            completed = resilience.call("supabase", lambda: supabase.rpc("complete_article", {
+                "p_id": row["id"],
+                "p_worker": worker_id,
+                "p_story": story,
+            }).execute()).data
+        except Exception as e:
+            print(f"  [{worker_id}] [ERROR] Error classifying {article['url']}: {e}")
+            release_article(worker_id, row)
+            continue
+
+        if completed:
+            if story:
+                boost_coverage(story, matches)
+            status = "Saved" if story else "Skipped"
+            print(f"  [{worker_id}] [OK] {status}: {article['title'][:60]} "
+                  f"(relevance: {analysis['relevance_score']:.2f})")
+        else:
+            print(f"  [{worker_id}] [SKIP] Lease lost, discarding result for {article['url']}")
+
+    return len(claimed)
+
+
+def run_worker(fleet_size: int = 1) -> None:
+    """Main worker loop: poll sources and classify articles until interrupted"""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    call_interval = classify_interval() * fleet_size
+    print(f"Worker {worker_id} started (one Gemini call every {call_interval:.0f}s)")
+
+    stop = threading.Event()
+    threading.Thread(target=heartbeat, args=(worker_id, stop), daemon=True).start()
+
+    last_call = [0.0]
+    try:
+        while True:
+            try:
+                busy = poll_sources(worker_id) + classify_articles(worker_id, last_call, call_interval)
+            except Exception as e:
+                print(f"  [{worker_id}] [ERROR] {e}")
+                busy = 0
+
+            # Keep polling while waiting for the next Gemini slot, but wake up for it
+            if not busy:
+                until_slot = last_call[0] + call_interval - time.time()
+                time.sleep(min(IDLE_SLEEP_SECONDS, until_slot) if until_slot > 0 else IDLE_SLEEP_SECONDS)
+    finally:
+        stop.set()
+
+
+def main():
+    """Start one or more local workers"""
+    parser = argparse.ArgumentParser(description="Daily Tech Brief ingestion worker")
+    parser.add_argument("--sync-sources", action="store_true",
+                        help="upsert the source registry into the sources table and exit")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of local worker processes to run")
+    args = parser.parse_args()
+
+    if args.sync_sources:
+        count = sync_sources()
+        print(f"[OK] Synced {count} sources")
+        return
+
+    fleet_size = int(WORKER_FLEET_SIZE or args.processes)
+
+    if args.processes == 1:
+        run_worker(fleet_size)
+        return
+
+    # Spawn (not fork) so each process opens its own Supabase and Gemini clients
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(fleet_size,))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,10 @@ CREATE TABLE stories (
     topics TEXT[],
     trust_score FLOAT DEFAULT 0.0,
     relevance_score FLOAT DEFAULT 0.0,
-    published_at TIMESTAMP,
+    coverage_count INTEGER DEFAULT 1,
+    coverage_sources TEXT[] DEFAULT '{}',
+    rank_score FLOAT,
+    published_at TIMESTAMPTZ,
     status VARCHAR(50) DEFAULT 'pending',
     created_at TIMESTAMP DEFAULT NOW()
 );
@@ -25,7 +28,9 @@ CREATE TABLE stories (
 CREATE INDEX idx_stories_published_at ON stories(published_at DESC);
 CREATE INDEX idx_stories_status ON stories(status);
 CREATE INDEX idx_stories_relevance ON stories(relevance_score DESC);
+CREATE INDEX idx_stories_rank ON stories(rank_score DESC) WHERE status = 'processed' AND rank_score IS NOT NULL;
 CREATE INDEX idx_stories_url ON stories(url);
+CREATE INDEX idx_stories_created_at ON stories(created_at);
 
 -- Daily digests table: stores curated daily selections
 CREATE TABLE daily_digests (
@@ -39,6 +44,60 @@ CREATE TABLE daily_digests (
 -- Index for date lookups
 CREATE INDEX idx_daily_digests_date ON daily_digests(digest_date DESC);
 
+-- Digest stories ledger: one row per story featured in a digest. url and
+-- source are copied so lookups keep working after stories are archived.
+CREATE TABLE digest_stories (
+    digest_date DATE NOT NULL REFERENCES daily_digests(digest_date) ON DELETE CASCADE,
+    story_id UUID NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    source VARCHAR(255),
+    PRIMARY KEY (digest_date, position)
+);
+
+CREATE INDEX idx_digest_stories_story_id ON digest_stories(story_id);
+CREATE INDEX idx_digest_stories_url ON digest_stories(url);
+CREATE INDEX idx_digest_stories_source_date ON digest_stories(source, digest_date DESC);
+
+-- Backfill the ledger from digests created before it existed
+INSERT INTO digest_stories (digest_date, story_id, position, url, source)
+SELECT d.digest_date, u.story_id, u.position, s.url, s.source
+FROM daily_digests d
+CROSS JOIN LATERAL unnest(d.story_ids) WITH ORDINALITY AS u(story_id, position)
+JOIN stories s ON s.id = u.story_id
+ON CONFLICT DO NOTHING;
+
+-- Sources table: registry of feeds polled by ingestion workers
+CREATE TABLE sources (
+    name VARCHAR(255) PRIMARY KEY,
+    domain VARCHAR(255),
+    rss_url TEXT NOT NULL,
+    trust_score FLOAT DEFAULT 0.0,
+    enabled BOOLEAN DEFAULT TRUE,
+    poll_interval_seconds INTEGER DEFAULT 3600,
+    consecutive_errors INTEGER DEFAULT 0,
+    next_poll_at TIMESTAMP DEFAULT NOW(),
+    lease_owner TEXT,
+    lease_expires_at TIMESTAMP
+);
+
+CREATE INDEX idx_sources_next_poll ON sources(next_poll_at) WHERE enabled;
+
+-- Article queue: fetched articles waiting for classification by a worker
+CREATE TABLE article_queue (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    url TEXT UNIQUE NOT NULL,
+    article JSONB NOT NULL,
+    status VARCHAR(50) DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX idx_article_queue_pending ON article_queue(created_at) WHERE status = 'pending';
+
 -- Function to get today's digest with stories
 CREATE OR REPLACE FUNCTION get_todays_digest()
 RETURNS JSON AS $$
@@ -71,7 +130,233 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Create or replace a day's digest together with its digest_stories rows, in
+-- one transaction. p_stories is an ordered JSON array of {id, url, source}.
+CREATE OR REPLACE FUNCTION save_daily_digest(p_digest_date DATE, p_stories JSONB)
+RETURNS TEXT AS $$
+DECLARE
+    existed BOOLEAN;
+BEGIN
+    SELECT EXISTS (SELECT 1 FROM daily_digests WHERE digest_date = p_digest_date) INTO existed;
+
+    INSERT INTO daily_digests (digest_date, story_ids, status)
+    VALUES (
+        p_digest_date,
+        ARRAY(
+            SELECT (e.story->>'id')::UUID
+            FROM jsonb_array_elements(p_stories) WITH ORDINALITY AS e(story, position)
+            ORDER BY e.position
+        ),
+        'ready'
+    )
+    ON CONFLICT (digest_date) DO UPDATE SET story_ids = EXCLUDED.story_ids;
+
+    DELETE FROM digest_stories WHERE digest_date = p_digest_date;
+
+    INSERT INTO digest_stories (digest_date, story_id, position, url, source)
+    SELECT p_digest_date, (e.story->>'id')::UUID, e.position, e.story->>'url', e.story->>'source'
+    FROM jsonb_array_elements(p_stories) WITH ORDINALITY AS e(story, position);
+
+    RETURN CASE WHEN existed THEN 'updated' ELSE 'created' END;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Count how often each source was featured in digests over the last p_days
+CREATE OR REPLACE FUNCTION source_feature_counts(p_days INTEGER)
+RETURNS TABLE(source VARCHAR, feature_count BIGINT) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT ds.source, COUNT(*)
+    FROM digest_stories ds
+    WHERE ds.digest_date >= CURRENT_DATE - p_days
+    GROUP BY ds.source
+    ORDER BY COUNT(*) DESC;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Claim up to p_limit due sources for a worker. Leased rows are skipped
+-- until their lease expires, so concurrent workers never share a source.
+CREATE OR REPLACE FUNCTION claim_sources(p_worker TEXT, p_limit INTEGER, p_lease_seconds INTEGER)
+RETURNS SETOF sources AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE sources s
+    SET lease_owner = p_worker,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE s.name IN (
+        SELECT name FROM sources
+        WHERE enabled
+        AND next_poll_at <= NOW()
+        AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+        ORDER BY next_poll_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING s.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Release a source lease and schedule its next poll
+CREATE OR REPLACE FUNCTION release_source(p_name TEXT, p_worker TEXT, p_interval_seconds INTEGER, p_errors INTEGER)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE sources
+    SET lease_owner = NULL,
+        lease_expires_at = NULL,
+        poll_interval_seconds = p_interval_seconds,
+        consecutive_errors = p_errors,
+        next_poll_at = NOW() + make_interval(secs => p_interval_seconds)
+    WHERE name = p_name
+    AND lease_owner = p_worker;
+
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Claim up to p_limit pending articles for classification. Articles whose
+-- last attempt's lease expired after p_max_attempts are marked failed.
+CREATE OR REPLACE FUNCTION claim_articles(p_worker TEXT, p_limit INTEGER, p_lease_seconds INTEGER, p_max_attempts INTEGER)
+RETURNS SETOF article_queue AS $$
+BEGIN
+    UPDATE article_queue
+    SET status = 'failed',
+        completed_at = NOW(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE status = 'pending'
+    AND attempts >= p_max_attempts
+    AND (lease_expires_at IS NULL OR lease_expires_at < NOW());
+
+    RETURN QUERY
+    UPDATE article_queue q
+    SET lease_owner = p_worker,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = q.attempts + 1
+    WHERE q.id IN (
+        SELECT id FROM article_queue
+        WHERE status = 'pending'
+        AND attempts < p_max_attempts
+        AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+        ORDER BY created_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING q.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Give up a claimed article after a failed attempt, so another worker can
+-- retry it; after p_max_attempts it is marked failed instead. With p_refund
+-- the claim is not counted as an attempt (e.g. Gemini was down).
+CREATE OR REPLACE FUNCTION release_article(p_id UUID, p_worker TEXT, p_max_attempts INTEGER, p_refund BOOLEAN)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_attempts INTEGER;
+BEGIN
+    SELECT attempts - CASE WHEN p_refund THEN 1 ELSE 0 END INTO v_attempts
+    FROM article_queue
+    WHERE id = p_id;
+
+    UPDATE article_queue
+    SET attempts = v_attempts,
+        status = CASE WHEN v_attempts >= p_max_attempts THEN 'failed' ELSE 'pending' END,
+        completed_at = CASE WHEN v_attempts >= p_max_attempts THEN NOW() ELSE NULL END,
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE id = p_id
+    AND status = 'pending'
+    AND lease_owner = p_worker;
+
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Extend all live leases held by a worker
+CREATE OR REPLACE FUNCTION heartbeat_leases(p_worker TEXT, p_lease_seconds INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    source_count INTEGER;
+    article_count INTEGER;
+BEGIN
+    UPDATE sources
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE lease_owner = p_worker
+    AND lease_expires_at >= NOW();
+    GET DIAGNOSTICS source_count = ROW_COUNT;
+
+    UPDATE article_queue
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE lease_owner = p_worker
+    AND lease_expires_at >= NOW()
+    AND status = 'pending';
+    GET DIAGNOSTICS article_count = ROW_COUNT;
+
+    RETURN source_count + article_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Complete a claimed article: mark it done and save its story (if any) in
+-- one transaction. Only the current lease holder can complete an article,
+-- and a story URL is only ever inserted once, so completion is idempotent.
+-- Done rows keep their lease_owner, so a retried call from the worker that
+-- completed the article still returns TRUE.
+CREATE OR REPLACE FUNCTION complete_article(p_id UUID, p_worker TEXT, p_story JSONB)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE article_queue
+    SET status = 'done',
+        completed_at = NOW(),
+        lease_expires_at = NULL
+    WHERE id = p_id
+    AND status = 'pending'
+    AND lease_owner = p_worker
+    AND lease_expires_at >= NOW();
+
+    IF NOT FOUND THEN
+        RETURN EXISTS (
+            SELECT 1 FROM article_queue
+            WHERE id = p_id AND status = 'done' AND lease_owner = p_worker
+        );
+    END IF;
+
+    IF p_story IS NOT NULL THEN
+        INSERT INTO stories (title, url, source, source_domain, raw_content, summary, topics, trust_score,
+                             relevance_score, coverage_count, coverage_sources, rank_score, published_at, status)
+        SELECT title, url, source, source_domain, raw_content, summary, topics, trust_score,
+               relevance_score, coverage_count, coverage_sources, rank_score, published_at, status
+        FROM jsonb_populate_record(NULL::stories, p_story)
+        ON CONFLICT (url) DO NOTHING;
+    END IF;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Count p_source as covering a story, once per source, and shift its rank
+-- score by the change in the coverage boost term (see backend/src/ranking.py).
+-- Right-hand sides see the row's old values, and the WHERE clause is
+-- re-checked under the row lock, so concurrent calls don't double count.
+CREATE OR REPLACE FUNCTION add_coverage_source(p_story_id UUID, p_source TEXT, p_coverage_boost FLOAT)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE stories
+    SET coverage_sources = array_append(coverage_sources, p_source),
+        coverage_count = coverage_count + 1,
+        rank_score = rank_score
+            + ln(1 + p_coverage_boost * ln(coverage_count + 1))
+            - ln(1 + p_coverage_boost * ln(coverage_count))
+    WHERE id = p_story_id
+    AND source <> p_source
+    AND NOT (p_source = ANY(coverage_sources));
+
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Optional: Function to clean up old stories (keep last 30 days)
+-- Note: this deletes rows outright. To keep full history, run
+-- backend/src/archive.py instead, which writes old stories to
+-- day-partitioned gzipped JSONL files before removing them.
 CREATE OR REPLACE FUNCTION cleanup_old_stories()
 RETURNS INTEGER AS $$
 DECLARE
@@ -89,6 +374,13 @@ $$ LANGUAGE plpgsql;
 -- Comments for documentation
 COMMENT ON TABLE stories IS 'Stores all fetched and processed articles';
 COMMENT ON TABLE daily_digests IS 'Stores daily curated digest selections';
+COMMENT ON TABLE digest_stories IS 'Ledger of stories featured in each digest, in digest order';
+COMMENT ON TABLE sources IS 'Feed registry; rows are leased to ingestion workers while polled';
+COMMENT ON TABLE article_queue IS 'Fetched articles awaiting classification; rows are leased to workers';
 COMMENT ON COLUMN stories.topics IS 'Array of topic tags for categorization';
 COMMENT ON COLUMN stories.relevance_score IS 'AI-generated relevance score (0.0-1.0)';
+COMMENT ON COLUMN stories.raw_content IS 'Feed excerpt; cleared once summarized and kept in the file archive';
 COMMENT ON COLUMN stories.trust_score IS 'Source credibility score (0.0-1.0)';
+COMMENT ON COLUMN stories.coverage_count IS 'Number of sources reporting the same story';
+COMMENT ON COLUMN stories.coverage_sources IS 'Other sources counted in coverage_count';
+COMMENT ON COLUMN stories.rank_score IS 'Time-invariant log score combining relevance, trust, coverage and recency (see backend/src/ranking.py)';
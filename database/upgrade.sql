@@ -0,0 +1,26 @@
+-- Daily Tech Brief - Upgrade an existing database
+-- Run this in your Supabase SQL Editor if the database was created from an
+-- older schema.sql. New databases only need schema.sql.
+
+-- Story ranking columns (see backend/src/ranking.py)
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS coverage_count INTEGER DEFAULT 1;
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS coverage_sources TEXT[] DEFAULT '{}';
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS rank_score FLOAT;
+
+-- Keep the feed's UTC offset instead of silently dropping it. Existing values
+-- are read as UTC; their original offsets are already lost.
+ALTER TABLE stories ALTER COLUMN published_at TYPE TIMESTAMPTZ USING published_at AT TIME ZONE 'UTC';
+
+DROP INDEX IF EXISTS idx_stories_rank;
+CREATE INDEX idx_stories_rank ON stories(rank_score DESC) WHERE status = 'processed' AND rank_score IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_stories_created_at ON stories(created_at);
+
+-- release_article gained a p_refund argument; drop the old signature so
+-- the RPC call is not ambiguous
+DROP FUNCTION IF EXISTS release_article(UUID, TEXT, INTEGER);
+
+-- New tables (digest_stories, sources, article_queue), the digest_stories
+-- backfill and all functions: run those sections of schema.sql. The
+-- functions use CREATE OR REPLACE, so re-running them is safe.
+
+-- Then score existing stories: cd backend/src && python ranking.py
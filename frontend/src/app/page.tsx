@@ -2,7 +2,9 @@ import { getTodaysDigest } from '@/lib/supabase'
 import StoryCard from '@/components/StoryCard'
 import Header from '@/components/Header'
 
-export const revalidate = 300 // Revalidate every 5 minutes
+// Rendered at build time from the static archive. The daily workflow commits
+// the new archive files, which triggers a redeploy, so page views never query Supabase.
+export const revalidate = false
 
 export default async function Home() {
   const digest = await getTodaysDigest()
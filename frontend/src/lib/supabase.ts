@@ -1,3 +1,5 @@
+import { promises as fs } from 'fs'
+import path from 'path'
 import { createClient } from '@supabase/supabase-js'
 
 const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL!
@@ -28,9 +30,32 @@ export interface DailyDigest {
   stories?: Story[]
 }
 
+// Static digest archive written by backend/src/static_archive.py
+const ARCHIVE_DIR = path.join(process.cwd(), 'public', 'archive')
+
+interface ArchiveIndexEntry {
+  digest_date: string
+  story_count: number
+  lead_title: string
+}
+
+async function readArchiveJson<T>(file: string): Promise<T | null> {
+  try {
+    return JSON.parse(await fs.readFile(path.join(ARCHIVE_DIR, file), 'utf-8')) as T
+  } catch {
+    return null
+  }
+}
+
 export async function getTodaysDigest(): Promise<DailyDigest | null> {
   const today = new Date().toISOString().split('T')[0]
 
+  // Serve from the static archive; only fall back to Supabase if it isn't built
+  const archived = await readArchiveJson<DailyDigest>(`digests/${today}.json`)
+  if (archived) {
+    return archived
+  }
+
   const { data: digest, error } = await supabase
     .from('daily_digests')
     .select('*')
@@ -59,6 +84,16 @@ export async function getTodaysDigest(): Promise<DailyDigest | null> {
 }
 
 export async function getRecentDigests(limit: number = 7): Promise<DailyDigest[]> {
+  const index = await readArchiveJson<ArchiveIndexEntry[]>('index.json')
+  if (index) {
+    const digests = await Promise.all(
+      index.slice(0, limit).map((entry) => readArchiveJson<DailyDigest>(`digests/${entry.digest_date}.json`))
+    )
+    return digests
+      .filter((digest): digest is DailyDigest => digest !== null)
+      .map(({ stories, ...digest }) => digest)
+  }
+
   const { data, error } = await supabase
     .from('daily_digests')
     .select('*')